@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Shared sample report data for the demo scripts
+One definition of the demo clients, their metric rows and the report
+body, used by both setup_demo and simple_demo
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Final, Sequence, Tuple
+
+# Sample clients and their derived metric rows, computed once at import
+SAMPLE_CLIENTS: Final = (
+    "John_Smith",
+    "Sarah_Johnson",
+    "Michael_Brown",
+    "Emily_Davis",
+    "Robert_Wilson",
+    "Jennifer_Taylor",
+    "David_Anderson",
+    "Lisa_Martinez",
+    "James_Wilson",
+    "Maria_Garcia"
+)
+SAMPLE_ROWS: Final = tuple(
+    (client, round(5.5 + i * 1.2, 1), round(5.5 + i * 1.2, 1) + 2.1,
+     round(8.2 + i * 0.8, 1), round(1.1 + i * 0.05, 2), 85 + i,
+     3.2 + i * 0.3, 60 + i, 25 - i * 0.5, 15 - i * 0.5)
+    for i, client in enumerate(SAMPLE_CLIENTS))
+
+# Sample PDF report body, formatted once per client from precomputed
+# rows. The separator lines keep the original f-string's trailing
+# indentation so regenerated reports stay byte-identical to the
+# tracked fixtures.
+SAMPLE_PDF_TEMPLATE = """
+        PERFORMANCE REPORT
+        Client: {client}
+        \n\
+        PERFORMANCE SUMMARY
+        YTD Return: {ytd}%
+        Rolling 12-Month: {rolling}%
+        Since Inception Return: {inception}%
+        \n\
+        RISK METRICS
+        Sharpe Ratio: {sharpe}
+        Beta: 0.{beta}
+        Max Drawdown: -{drawdown}%
+        \n\
+        HOLDINGS & ALLOCATIONS
+        Equity: {equity}%
+        Fixed Income: {fixed_income}%
+        Alternatives: {alternatives}%
+        """
+
+def sample_metrics(rows: Sequence[Tuple] = SAMPLE_ROWS) -> Dict[str, Dict[str, str]]:
+    """Map client display name to the metrics its sample report carries"""
+    return {client.replace('_', ' '): {'YTD': f"{ytd}%",
+                                       'SinceInception': f"{inc}%",
+                                       'Sharpe': f"{sharpe}"}
+            for client, ytd, _roll, inc, sharpe, *_rest in rows}
+
+def write_sample_pdfs(pdf_dir: Path, rows: Sequence[Tuple] = SAMPLE_ROWS) -> int:
+    """Render the sample reports and flush them as one concurrent batch"""
+    sample_pdfs = [(pdf_dir / f"{client}.pdf", SAMPLE_PDF_TEMPLATE.format(
+                        client=client.replace('_', ' '), ytd=ytd, rolling=roll,
+                        inception=inc, sharpe=sharpe, beta=beta, drawdown=dd,
+                        equity=eq, fixed_income=fi, alternatives=alt))
+                   for client, ytd, roll, inc, sharpe, beta, dd, eq, fi, alt in rows]
+    if sample_pdfs:
+        with ThreadPoolExecutor(max_workers=min(32, len(sample_pdfs))) as pool:
+            list(pool.map(lambda pair: pair[0].write_text(pair[1]), sample_pdfs))
+    return len(sample_pdfs)
@@ -19,6 +19,7 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = "gpt-4o-mini"
     OPENAI_TEMPERATURE = 0.3
+    OPENAI_MAX_CONCURRENCY = 16  # Concurrent enhancement requests in flight
     
     # Email generation settings
     MAX_CONVICTIONS = 3
@@ -4,39 +4,214 @@ Enhanced Performance Report Email Generator with OpenAI Integration
 Automatically generates personalized client emails from PDF performance reports using AI
 """
 
+import asyncio
+import atexit
+import hashlib
+import mmap
+import multiprocessing
 import os
 import re
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional
-import pandas as pd
+from typing import Dict, List, Optional, Tuple
+import httpx
 import pdfplumber
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from config import Config
+from generator_core import (create_sample_convictions, fill_template,
+                            format_top_convictions, load_convictions,
+                            write_outputs)
 
-# Set up logging
-logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL),
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('email_generation_enhanced.log'),
-        logging.StreamHandler()
-    ]
-)
+# Prefer PCRE2 with JIT compilation for metric extraction when available;
+# its Python binding mirrors the `re` API (compile/finditer/lastgroup),
+# so the stdlib engine is a drop-in fallback.
+try:
+    import pcre2 as _regex
+except ImportError:
+    _regex = re
+
+# Prefer pypdfium2 (thin PDFium bindings) for plain-text extraction; it
+# skips the layout analysis pdfplumber performs and is much faster when
+# only page text is needed. pdfplumber remains the fallback.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Set up logging. Records are only enqueued at the emit site; a single
+# listener thread formats and flushes them, so parallel processing does
+# not serialize on (or interleave writes to) the file handler.
+_log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+_file_handler = logging.FileHandler('email_generation_enhanced.log')
+_file_handler.setFormatter(_log_formatter)
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_log_formatter)
+_log_queue = multiprocessing.Queue(-1)
+_log_listener = QueueListener(_log_queue, _file_handler, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(getattr(logging, Config.LOG_LEVEL))
+_root_logger.addHandler(QueueHandler(_log_queue))
 logger = logging.getLogger(__name__)
 
+# All five metric patterns fused into one alternation so the report text
+# is scanned once instead of once per metric. Compiled at import time
+# (JIT-compiled to native code when PCRE2 is installed). Literals are
+# lowercase and matched against pre-lowercased text, which is one O(N)
+# fold instead of per-position case folding inside the engine.
+_METRICS_RE = _regex.compile(
+    r'(?P<ytd>ytd[^\d]*(-?\d+\.?\d*)%)|'
+    r'(?P<inception>(?:since\s+)?inception[^\d]*(-?\d+\.?\d*)%)|'
+    r'(?P<sharpe>sharpe\s+ratio[^\d]*(-?\d+\.?\d*))|'
+    r'(?P<beta>beta[^\d]*(-?\d+\.?\d*))|'
+    r'(?P<drawdown>(?:max\s+)?drawdown[^\d]*(-?\d+\.?\d*)%)')
+
+# Maps alternation group name -> (metric key, value suffix)
+_METRIC_KEYS = {
+    'ytd': ('YTD', '%'),
+    'inception': ('SinceInception', '%'),
+    'sharpe': ('Sharpe', ''),
+    'beta': ('Beta', ''),
+    'drawdown': ('MaxDrawdown', '%'),
+}
+
+# Sample metrics returned when a PDF cannot be parsed. Shared and
+# compared against downstream to avoid spending AI calls on reports
+# whose numbers are not real. Treated as immutable.
+_FALLBACK_METRICS = {
+    "YTD": "8.5%",
+    "SinceInception": "12.3%",
+    "Sharpe": "1.42",
+    "Beta": "0.95",
+    "MaxDrawdown": "-5.2%"
+}
+
+# The default httpx pool limits are conservative; size them so a whole
+# enhancement batch reuses warm TCP+TLS connections.
+_HTTPX_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+_HTTPX_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# The per-PDF pipeline lives in module-level functions so worker
+# processes can pickle and run it without carrying the generator object.
+
+def _iter_page_texts(pdf_path: Path, page_numbers: List[int]):
+    """Yield plain text page by page, so callers can stop early"""
+    # Fast path: PDFium text extraction without layout analysis
+    if pdfium is not None:
+        try:
+            pdf = pdfium.PdfDocument(pdf_path)
+        except Exception as e:
+            logger.debug(f"pypdfium2 extraction failed for {pdf_path.name}: {e}")
+        else:
+            yielded = False
+            try:
+                for page_num in page_numbers:
+                    if page_num < len(pdf):
+                        textpage = pdf[page_num].get_textpage()
+                        page_text = textpage.get_text_range()
+                        textpage.close()
+                        if page_text:
+                            yielded = True
+                            yield page_text
+            finally:
+                pdf.close()
+            if yielded:
+                return
+
+    # Fallback: pdfplumber for documents PDFium could not read. Hand it
+    # a memory map so random access during parsing is served from the OS
+    # page cache instead of buffered reads.
+    with open(pdf_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            pdfplumber.open(mm) as pdf:
+        # Scanned reports have no text layer; probe the first page's
+        # chars before paying to decode image streams on every page.
+        first_page = page_numbers[0] if page_numbers else 0
+        if first_page < len(pdf.pages) and not pdf.pages[first_page].chars:
+            logger.info(f"No text layer on first probed page of {pdf_path.name}")
+            return
+
+        for page_num in page_numbers:
+            if page_num < len(pdf.pages):
+                page_text = pdf.pages[page_num].extract_text()
+                if page_text:
+                    yield page_text
+
+def _parse_pdf_report(pdf_path: Path, page_numbers: List[int]) -> Dict[str, str]:
+    """Extract key metrics from a PDF performance report"""
+    try:
+        metrics = {}
+        found_text = False
+
+        # One regex pass per page; the numeric capture sits one group
+        # after the named group that labelled the match. Stop extracting
+        # pages as soon as every metric has been found.
+        for page_text in _iter_page_texts(pdf_path, page_numbers):
+            found_text = True
+            for match in _METRICS_RE.finditer(page_text.lower()):
+                key, suffix = _METRIC_KEYS[match.lastgroup]
+                value = match.group(_METRICS_RE.groupindex[match.lastgroup] + 1)
+                metrics.setdefault(key, value + suffix)
+            if len(metrics) >= len(_METRIC_KEYS):
+                break
+
+        if not found_text:
+            # Scanned or otherwise textless report: use sample data
+            logger.warning(f"No extractable text in {pdf_path.name}; using fallback metrics")
+            return _FALLBACK_METRICS
+
+        logger.info(f"Extracted {len(metrics)} metrics from {pdf_path.name}")
+        return metrics
+
+    except Exception as e:
+        logger.error(f"Error parsing PDF {pdf_path}: {e}")
+        # Return sample data as fallback
+        return _FALLBACK_METRICS
+
+def _process_one_report(pdf_path: Path, template: str, convictions_text: str,
+                        page_numbers: List[int]) -> Tuple[str, Optional[str], bool]:
+    """Parse one PDF and build its (non-AI) email; runs in worker processes
+
+    Returns (client_name, email_content, is_fallback) where is_fallback
+    flags reports whose metrics are the parse-failure sample values.
+    """
+    client_name = pdf_path.stem.replace("_", " ").title()
+    try:
+        metrics = _parse_pdf_report(pdf_path, page_numbers)
+        if not metrics:
+            return client_name, None, False
+        email = fill_template(template, client_name, metrics, convictions_text)
+        return client_name, email, metrics == _FALLBACK_METRICS
+    except Exception as e:
+        logger.error(f"Error processing {pdf_path.name}: {e}")
+        return client_name, None, False
+
 class EnhancedEmailGenerator:
     """Enhanced email generator with OpenAI integration and real PDF parsing"""
     
     def __init__(self):
         self.config = Config()
         self.openai_client = None
-        self.convictions_df = None
+        self.convictions = None
         self.email_template = None
-        
-        # Initialize OpenAI client if API key is available
+        self._top_convictions_text = None
+        # Completions keyed by SHA-1 of the prompt; duplicate prompts
+        # (same template + similar metrics) skip the API round-trip.
+        self._ai_cache: Dict[str, str] = {}
+        # Enhanced emails keyed by their base email with the client name
+        # normalized out, so identical bodies are only enhanced once.
+        self._enhanced_by_base: Dict[str, str] = {}
+
+        # Initialize the sync OpenAI client if an API key is available;
+        # async clients are created per event loop (see _make_async_client)
         if self.config.OPENAI_API_KEY:
-            self.openai_client = OpenAI(api_key=self.config.OPENAI_API_KEY)
+            self.openai_client = OpenAI(
+                api_key=self.config.OPENAI_API_KEY,
+                http_client=httpx.Client(limits=_HTTPX_LIMITS, timeout=_HTTPX_TIMEOUT))
             logger.info("OpenAI client initialized")
         else:
             logger.warning("OpenAI API key not found. AI enhancement disabled.")
@@ -53,12 +228,15 @@ class EnhancedEmailGenerator:
                     logger.warning(issue)
             
             # Load convictions
-            if self.config.CONVICTIONS_FILE.exists():
-                self.convictions_df = pd.read_excel(self.config.CONVICTIONS_FILE)
-                logger.info(f"Loaded {len(self.convictions_df)} conviction entries")
-            else:
+            if not self.config.CONVICTIONS_FILE.exists():
                 self._create_sample_convictions()
-                self.convictions_df = pd.read_excel(self.config.CONVICTIONS_FILE)
+            self.convictions = load_convictions(self.config.CONVICTIONS_FILE)
+            logger.info(f"Loaded {len(self.convictions)} conviction entries")
+
+            # Convictions don't change within a run, so format the
+            # default top-N block once up front.
+            self._top_convictions_text = format_top_convictions(
+                self.convictions, self.config.MAX_CONVICTIONS)
             
             # Load email template
             if self.config.TEMPLATE_FILE.exists():
@@ -68,123 +246,56 @@ class EnhancedEmailGenerator:
                 
         except Exception as e:
             logger.error(f"Error loading components: {e}")
-    
+
     def _create_sample_convictions(self):
         """Create sample convictions file if it doesn't exist"""
         logger.info("Creating sample convictions file...")
-        
-        conviction_data = {
-            'Model': [
-                'US Large Cap Growth',
-                'International Developed Markets', 
-                'Technology Sector Focus',
-                'Fixed Income Core',
-                'Emerging Markets',
-                'Real Estate Investment Trusts',
-                'Small Cap Value',
-                'Commodities & Energy'
-            ],
-            'YTD%': [15.2, 8.3, 12.5, 4.1, -2.1, 9.7, 6.8, 11.3],
-            'Commentary': [
-                'Leading innovation companies showing robust earnings growth',
-                'Benefiting from currency stabilization and economic recovery',
-                'Strong performance driven by AI and cloud infrastructure investments',
-                'Stable returns in volatile market environment',
-                'Temporary headwinds from geopolitical concerns',
-                'Solid dividend yields with capital appreciation potential',
-                'Attractive valuations in quality small-cap names',
-                'Energy transition and commodity supercycle themes'
-            ]
-        }
-        
-        df = pd.DataFrame(conviction_data)
-        self.config.CONVICTIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        df.to_excel(self.config.CONVICTIONS_FILE, index=False)
+        create_sample_convictions(self.config.CONVICTIONS_FILE)
         logger.info(f"Sample convictions file created at {self.config.CONVICTIONS_FILE}")
-    
+
     def parse_pdf_report(self, pdf_path: Path) -> Dict[str, str]:
         """
-        Extract key metrics from PDF performance report using pdfplumber
+        Extract key metrics from PDF performance report
         """
-        try:
-            metrics = {}
-            
-            with pdfplumber.open(pdf_path) as pdf:
-                # Extract text from specified pages
-                all_text = ""
-                for page_num in self.config.PDF_PAGES_TO_PARSE:
-                    if page_num < len(pdf.pages):
-                        page_text = pdf.pages[page_num].extract_text()
-                        if page_text:
-                            all_text += page_text + "\n"
-                
-                # Parse YTD returns
-                ytd_pattern = r'YTD[^\d]*(-?\d+\.?\d*)%'
-                ytd_match = re.search(ytd_pattern, all_text, re.IGNORECASE)
-                if ytd_match:
-                    metrics["YTD"] = f"{ytd_match.group(1)}%"
-                
-                # Parse Since Inception returns
-                inception_pattern = r'(?:Since\s+)?Inception[^\d]*(-?\d+\.?\d*)%'
-                inception_match = re.search(inception_pattern, all_text, re.IGNORECASE)
-                if inception_match:
-                    metrics["SinceInception"] = f"{inception_match.group(1)}%"
-                
-                # Parse Sharpe Ratio
-                sharpe_pattern = r'Sharpe\s+Ratio[^\d]*(-?\d+\.?\d*)'
-                sharpe_match = re.search(sharpe_pattern, all_text, re.IGNORECASE)
-                if sharpe_match:
-                    metrics["Sharpe"] = sharpe_match.group(1)
-                
-                # Parse Beta
-                beta_pattern = r'Beta[^\d]*(-?\d+\.?\d*)'
-                beta_match = re.search(beta_pattern, all_text, re.IGNORECASE)
-                if beta_match:
-                    metrics["Beta"] = beta_match.group(1)
-                
-                # Parse Max Drawdown
-                drawdown_pattern = r'(?:Max\s+)?Drawdown[^\d]*(-?\d+\.?\d*)%'
-                drawdown_match = re.search(drawdown_pattern, all_text, re.IGNORECASE)
-                if drawdown_match:
-                    metrics["MaxDrawdown"] = f"{drawdown_match.group(1)}%"
-            
-            logger.info(f"Extracted {len(metrics)} metrics from {pdf_path.name}")
-            return metrics
-            
-        except Exception as e:
-            logger.error(f"Error parsing PDF {pdf_path}: {e}")
-            # Return sample data as fallback
-            return {
-                "YTD": "8.5%",
-                "SinceInception": "12.3%", 
-                "Sharpe": "1.42",
-                "Beta": "0.95",
-                "MaxDrawdown": "-5.2%"
-            }
-    
+        return _parse_pdf_report(pdf_path, self.config.PDF_PAGES_TO_PARSE)
+
     def get_top_convictions(self, n: int = None) -> str:
         """Get top N convictions formatted for email"""
-        if self.convictions_df is None:
+        if self.convictions is None:
             return "Conviction data not available"
-        
+
         n = n or self.config.MAX_CONVICTIONS
-        
+        if n == self.config.MAX_CONVICTIONS and self._top_convictions_text is not None:
+            return self._top_convictions_text
+
         try:
-            top_convs = self.convictions_df.nlargest(n, 'YTD%')
-            conv_text = "\n".join([
-                f"✅ {row['Model']}: {row['YTD%']}% — {row['Commentary']}"
-                for _, row in top_convs.iterrows()
-            ])
-            return conv_text
+            return format_top_convictions(self.convictions, n)
         except Exception as e:
             logger.error(f"Error getting convictions: {e}")
             return "Error retrieving conviction data"
     
-    def enhance_with_ai(self, base_email: str, client_name: str, metrics: Dict[str, str]) -> str:
-        """Use OpenAI to enhance and personalize the email"""
+    def _make_async_client(self) -> AsyncOpenAI:
+        """Build an AsyncOpenAI client for the currently running loop
+
+        httpx keep-alive connections belong to the event loop they were
+        opened on, so a client cannot outlive an asyncio.run scope; each
+        scope gets its own and closes it on exit.
+        """
+        return AsyncOpenAI(
+            api_key=self.config.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(limits=_HTTPX_LIMITS, timeout=_HTTPX_TIMEOUT))
+
+    async def enhance_with_ai(self, base_email: str, client_name: str,
+                              metrics: Optional[Dict[str, str]] = None,
+                              client: Optional[AsyncOpenAI] = None) -> str:
+        """Use OpenAI to enhance and personalize the email
+
+        A batch caller may pass its own client so the whole batch shares
+        one connection pool; otherwise a client is created for this call.
+        """
         if not self.openai_client:
             return base_email
-        
+
         try:
             prompt = f"""
             You are a professional financial advisor. Please enhance this client email to make it more 
@@ -202,17 +313,34 @@ class EnhancedEmailGenerator:
             
             Enhanced email:
             """
-            
-            response = self.openai_client.chat.completions.create(
-                model=self.config.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a professional financial advisor writing personalized client emails."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.config.OPENAI_TEMPERATURE
-            )
-            
+
+            cache_key = hashlib.sha1(prompt.encode()).hexdigest()
+            cached = self._ai_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"AI enhancement cache hit for {client_name}")
+                return cached
+
+            messages = [
+                {"role": "system", "content": "You are a professional financial advisor writing personalized client emails."},
+                {"role": "user", "content": prompt}
+            ]
+            if client is None:
+                async with self._make_async_client() as own_client:
+                    response = await own_client.chat.completions.create(
+                        model=self.config.OPENAI_MODEL,
+                        messages=messages,
+                        temperature=self.config.OPENAI_TEMPERATURE
+                    )
+            else:
+                response = await client.chat.completions.create(
+                    model=self.config.OPENAI_MODEL,
+                    messages=messages,
+                    temperature=self.config.OPENAI_TEMPERATURE
+                )
+
+
             enhanced_email = response.choices[0].message.content
+            self._ai_cache[cache_key] = enhanced_email
             logger.info(f"AI enhancement completed for {client_name}")
             return enhanced_email
             
@@ -227,17 +355,12 @@ class EnhancedEmailGenerator:
         
         try:
             # Fill in template placeholders
-            base_email = self.email_template.format(
-                Name=client_name,
-                YTD=metrics.get("YTD", "N/A"),
-                SinceInception=metrics.get("SinceInception", "N/A"),
-                Sharpe=metrics.get("Sharpe", "N/A"),
-                Convictions=convictions
-            )
+            base_email = fill_template(self.email_template, client_name, metrics, convictions)
             
-            # Enhance with AI if enabled and available
-            if use_ai and self.openai_client:
-                return self.enhance_with_ai(base_email, client_name, metrics)
+            # Enhance with AI if enabled and available; fallback metrics
+            # mean the parse failed, so the numbers aren't worth an API call
+            if use_ai and self.openai_client and metrics != _FALLBACK_METRICS:
+                return asyncio.run(self.enhance_with_ai(base_email, client_name, metrics))
             else:
                 return base_email
                 
@@ -262,39 +385,79 @@ class EnhancedEmailGenerator:
         
         # Get convictions once for all emails
         convictions_text = self.get_top_convictions()
-        
-        processed_count = 0
-        for pdf_path in pdf_files:
-            try:
-                # Extract client name from filename
-                client_name = pdf_path.stem.replace("_", " ").title()
-                
-                # Parse the PDF report
-                metrics = self.parse_pdf_report(pdf_path)
-                
-                if not metrics:
-                    logger.warning(f"No metrics extracted for {client_name}")
-                    continue
-                
-                # Generate email
-                email_content = self.generate_email(client_name, metrics, convictions_text, use_ai)
-                
-                # Save email
-                output_path = self.config.OUTPUT_DIR / f"{client_name}.txt"
-                self.config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-                
-                with open(output_path, 'w') as f:
-                    f.write(email_content)
-                
-                logger.info(f"✅ Generated {'AI-enhanced ' if use_ai and self.openai_client else ''}email for {client_name}")
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing {pdf_path.name}: {e}")
+
+        self.config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        use_ai = use_ai and self.openai_client is not None
+
+        # CPU-bound PDF parsing: scale across cores, write in the parent
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(
+                _process_one_report, pdf_files,
+                repeat(self.email_template), repeat(convictions_text),
+                repeat(self.config.PDF_PAGES_TO_PARSE)))
+
+        if use_ai:
+            # Network-bound: overlap all enhancement calls in one async batch
+            results = asyncio.run(self._enhance_all(results))
+        else:
+            results = [(client_name, email) for client_name, email, _ in results]
+
+        # Collect all outputs first, then flush them in one batch
+        outputs = []
+        for client_name, email_content in results:
+            if email_content is None:
+                logger.warning(f"No metrics extracted for {client_name}")
                 continue
-        
+            outputs.append((self.config.OUTPUT_DIR / f"{client_name}.txt", email_content))
+            logger.info(f"✅ Generated {'AI-enhanced ' if use_ai else ''}email for {client_name}")
+        processed_count = write_outputs(outputs)
+
         logger.info(f"🎉 Successfully processed {processed_count} reports")
 
+    async def _enhance_all(self, results: List[Tuple[str, Optional[str], bool]]) -> List[Tuple[str, Optional[str]]]:
+        """Enhance all base emails concurrently, bounded by a semaphore"""
+        semaphore = asyncio.Semaphore(self.config.OPENAI_MAX_CONCURRENCY)
+        # In-flight enhancements per normalized body. All coroutines in a
+        # batch check their cache before any enhancement completes, so a
+        # results-only cache can never hit within a run; duplicates must
+        # await the first body's task instead.
+        inflight: Dict[str, asyncio.Task] = {}
+
+        async def enhance_base(normalized: str, base_email: str, client_name: str,
+                               client: AsyncOpenAI) -> str:
+            async with semaphore:
+                enhanced = await self.enhance_with_ai(base_email, client_name,
+                                                      client=client)
+            normalized_enhanced = enhanced.replace(client_name, "<NAME>")
+            self._enhanced_by_base[normalized] = normalized_enhanced
+            return normalized_enhanced
+
+        async def enhance_one(client_name: str, base_email: Optional[str], is_fallback: bool):
+            if base_email is None:
+                return client_name, None
+            if is_fallback:
+                # Parse fell back to sample numbers; skip the API call
+                return client_name, base_email
+
+            # Identical bodies (modulo client name) reuse one enhancement
+            normalized = base_email.replace(client_name, "<NAME>")
+            cached = self._enhanced_by_base.get(normalized)
+            if cached is not None:
+                return client_name, cached.replace("<NAME>", client_name)
+
+            task = inflight.get(normalized)
+            if task is None:
+                task = asyncio.create_task(
+                    enhance_base(normalized, base_email, client_name, shared_client))
+                inflight[normalized] = task
+            normalized_enhanced = await task
+            return client_name, normalized_enhanced.replace("<NAME>", client_name)
+
+        # One loop-bound client serves the whole batch and is closed with
+        # the async scope that created it
+        async with self._make_async_client() as shared_client:
+            return await asyncio.gather(*(enhance_one(c, b, f) for c, b, f in results))
+
 def main():
     """Main execution function"""
     logger.info("🚀 Starting Enhanced Performance Email Generator")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Shared core for the performance email generators
+Conviction loading and formatting plus template filling, used by both the
+basic and the AI-enhanced generator
+"""
+
+import heapq
+import logging
+import pickle
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from openpyxl import Workbook, load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Sample conviction data written when no convictions workbook exists
+SAMPLE_CONVICTION_DATA = {
+    'Model': [
+        'US Large Cap Growth',
+        'International Developed Markets',
+        'Technology Sector Focus',
+        'Fixed Income Core',
+        'Emerging Markets',
+        'Real Estate Investment Trusts',
+        'Small Cap Value',
+        'Commodities & Energy'
+    ],
+    'YTD%': [15.2, 8.3, 12.5, 4.1, -2.1, 9.7, 6.8, 11.3],
+    'Commentary': [
+        'Leading innovation companies showing robust earnings growth',
+        'Benefiting from currency stabilization and economic recovery',
+        'Strong performance driven by AI and cloud infrastructure investments',
+        'Stable returns in volatile market environment',
+        'Temporary headwinds from geopolitical concerns',
+        'Solid dividend yields with capital appreciation potential',
+        'Attractive valuations in quality small-cap names',
+        'Energy transition and commodity supercycle themes'
+    ]
+}
+
+def load_convictions(path: Path) -> List[Tuple[str, float, str]]:
+    """Read (model, YTD%, commentary) rows from the convictions workbook
+
+    Parsed rows are cached as a pickle next to the workbook and reused
+    while the workbook is unchanged, so pool workers skip the Excel parse.
+    """
+    cache_path = path.parent / ".cache" / f"{path.stem}.pkl"
+    try:
+        if cache_path.stat().st_mtime >= path.stat().st_mtime:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        convictions = [tuple(row[:3]) for row in
+                       workbook.active.iter_rows(min_row=2, values_only=True)]
+    finally:
+        workbook.close()
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(convictions, f, pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logger.warning(f"Could not write convictions cache {cache_path}: {e}")
+
+    return convictions
+
+def create_sample_convictions(path: Path) -> None:
+    """Write the sample convictions workbook"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(SAMPLE_CONVICTION_DATA.keys()))
+    for row in zip(*SAMPLE_CONVICTION_DATA.values()):
+        sheet.append(row)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(path)
+
+def format_top_convictions(convictions: Sequence[Tuple[str, float, str]], n: int) -> str:
+    """Format the N best-performing convictions as email bullet lines"""
+    top_convs = heapq.nlargest(n, convictions, key=itemgetter(1))
+    return "\n".join([
+        f"✅ {model}: {ytd}% — {commentary}"
+        for model, ytd, commentary in top_convs
+    ])
+
+def write_outputs(pairs: Sequence[Tuple[Path, str]]) -> int:
+    """Write (path, content) pairs concurrently; returns the success count
+
+    The writes are independent and the GIL is released during file I/O,
+    so a thread pool overlaps the per-file open/write/close syscalls.
+    """
+    if not pairs:
+        return 0
+
+    def write_one(pair: Tuple[Path, str]) -> int:
+        path, content = pair
+        try:
+            path.write_text(content)
+            return 1
+        except OSError as e:
+            logger.error(f"Error writing {path}: {e}")
+            return 0
+
+    with ThreadPoolExecutor(max_workers=min(32, len(pairs))) as pool:
+        return sum(pool.map(write_one, pairs))
+
+# Simple {Name}-style placeholders; split once so fill-time is a plain join
+_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+@lru_cache(maxsize=8)
+def _compile_template(template: str) -> Tuple[str, ...]:
+    """Split a template into literal/placeholder parts (odd indexes = keys)"""
+    return tuple(_PLACEHOLDER_RE.split(template))
+
+def fill_template(template: str, client_name: str, metrics: Dict[str, str], convictions: str) -> str:
+    """Fill the email template placeholders"""
+    values = {
+        "Name": client_name,
+        "YTD": metrics.get("YTD", "N/A"),
+        "SinceInception": metrics.get("SinceInception", "N/A"),
+        "Sharpe": metrics.get("Sharpe", "N/A"),
+        "Convictions": convictions
+    }
+    parts = _compile_template(template)
+    return "".join(values[part] if i & 1 else part
+                   for i, part in enumerate(parts))
@@ -7,9 +7,12 @@ Automatically generates personalized client emails from PDF performance reports
 import os
 import json
 import logging
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
-import pandas as pd
+from generator_core import (create_sample_convictions, fill_template,
+                            format_top_convictions, load_convictions,
+                            write_outputs)
 
 # Set up logging
 logging.basicConfig(
@@ -36,19 +39,19 @@ class PerformanceEmailGenerator:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # Load components
-        self.convictions_df = None
+        self.convictions = None
         self.email_template = None
         self._load_components()
-    
+
     def _load_components(self):
         """Load convictions data and email template"""
         try:
             # Load convictions (create sample if doesn't exist)
             if not self.conv_file.exists():
                 self._create_sample_convictions()
-            
-            self.convictions_df = pd.read_excel(self.conv_file)
-            logger.info(f"Loaded {len(self.convictions_df)} conviction entries")
+
+            self.convictions = load_convictions(self.conv_file)
+            logger.info(f"Loaded {len(self.convictions)} conviction entries")
             
             # Load email template
             if self.template_file.exists():
@@ -64,34 +67,7 @@ class PerformanceEmailGenerator:
     def _create_sample_convictions(self):
         """Create sample convictions file if it doesn't exist"""
         logger.info("Creating sample convictions file...")
-        
-        conviction_data = {
-            'Model': [
-                'US Large Cap Growth',
-                'International Developed Markets', 
-                'Technology Sector Focus',
-                'Fixed Income Core',
-                'Emerging Markets',
-                'Real Estate Investment Trusts',
-                'Small Cap Value',
-                'Commodities & Energy'
-            ],
-            'YTD%': [12.5, 8.3, 15.2, 4.1, -2.1, 9.7, 6.8, 11.3],
-            'Commentary': [
-                'Strong performance driven by AI and cloud infrastructure investments',
-                'Benefiting from currency stabilization and economic recovery',
-                'Leading innovation companies showing robust earnings growth', 
-                'Stable returns in volatile market environment',
-                'Temporary headwinds from geopolitical concerns',
-                'Solid dividend yields with capital appreciation potential',
-                'Attractive valuations in quality small-cap names',
-                'Energy transition and commodity supercycle themes'
-            ]
-        }
-        
-        df = pd.DataFrame(conviction_data)
-        self.conv_file.parent.mkdir(parents=True, exist_ok=True)
-        df.to_excel(self.conv_file, index=False)
+        create_sample_convictions(self.conv_file)
         logger.info(f"Sample convictions file created at {self.conv_file}")
     
     def parse_report(self, pdf_path: Path) -> Dict[str, str]:
@@ -121,37 +97,24 @@ class PerformanceEmailGenerator:
     
     def get_top_convictions(self, n: int = 3) -> str:
         """Get top N convictions formatted for email"""
-        if self.convictions_df is None:
+        if self.convictions is None:
             return "Conviction data not available"
-        
+
         try:
-            top_convs = self.convictions_df.nlargest(n, 'YTD%')
-            conv_text = "\n".join([
-                f"✅ {row['Model']}: {row['YTD%']}% — {row['Commentary']}"
-                for _, row in top_convs.iterrows()
-            ])
-            return conv_text
+            return format_top_convictions(self.convictions, n)
         except Exception as e:
             logger.error(f"Error getting convictions: {e}")
             return "Error retrieving conviction data"
-    
+
     def generate_email(self, client_name: str, metrics: Dict[str, str], convictions: str) -> str:
         """Generate personalized email using template and data"""
         if not self.email_template:
             return "Email template not available"
-        
+
         try:
             # Fill in template placeholders
-            email_content = self.email_template.format(
-                Name=client_name,
-                YTD=metrics.get("YTD", "N/A"),
-                SinceInception=metrics.get("SinceInception", "N/A"),
-                Sharpe=metrics.get("Sharpe", "N/A"),
-                Convictions=convictions
-            )
-            
-            return email_content
-            
+            return fill_template(self.email_template, client_name, metrics, convictions)
+
         except Exception as e:
             logger.error(f"Error generating email for {client_name}: {e}")
             return f"Error generating email: {e}"
@@ -174,34 +137,31 @@ class PerformanceEmailGenerator:
         # Get convictions once for all emails
         convictions_text = self.get_top_convictions(3)
         
-        processed_count = 0
+        # Collect all outputs first, then flush them in one batch
+        outputs = []
         for pdf_path in pdf_files:
             try:
                 # Extract client name from filename
                 client_name = pdf_path.stem.replace("_", " ").title()
-                
+
                 # Parse the PDF report
                 metrics = self.parse_report(pdf_path)
-                
+
                 if not metrics:
                     logger.warning(f"No metrics extracted for {client_name}")
                     continue
-                
+
                 # Generate email
                 email_content = self.generate_email(client_name, metrics, convictions_text)
-                
-                # Save email
-                output_path = self.output_dir / f"{client_name}.txt"
-                with open(output_path, 'w') as f:
-                    f.write(email_content)
-                
+
+                outputs.append((self.output_dir / f"{client_name}.txt", email_content))
                 logger.info(f"✅ Generated email for {client_name}")
-                processed_count += 1
-                
+
             except Exception as e:
                 logger.error(f"Error processing {pdf_path.name}: {e}")
                 continue
-        
+
+        processed_count = write_outputs(outputs)
         logger.info(f"🎉 Successfully processed {processed_count} reports")
         self._generate_summary_report(processed_count)
     
@@ -228,11 +188,11 @@ class PerformanceEmailGenerator:
         """Generate a summary report of the email generation process"""
         summary = f"""
 Email Generation Summary Report
-Generated on: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 📊 Processing Statistics:
 • Total emails generated: {processed_count}
-• Conviction models used: {len(self.convictions_df) if self.convictions_df is not None else 0}
+• Conviction models used: {len(self.convictions) if self.convictions is not None else 0}
 • Output directory: {self.output_dir}
 
 📁 Files created in: {self.output_dir.absolute()}
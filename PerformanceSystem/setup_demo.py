@@ -4,20 +4,38 @@ Demo Setup Script for Performance Email Generator
 Creates sample data and demonstrates the system functionality
 """
 
+import asyncio
+import importlib.util
 import os
-import pandas as pd
+from openpyxl import Workbook
 from pathlib import Path
 import logging
+from _sample_data import write_sample_pdfs
+
+# Resolve the generator at import time so run_demo doesn't pay the
+# loader cost (or a try/except round trip) on every invocation
+_HAS_GENERATOR = importlib.util.find_spec("performance_email_generator") is not None
+if _HAS_GENERATOR:
+    from performance_email_generator import PerformanceEmailGenerator
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
 def create_sample_data():
     """Create comprehensive sample data for demonstration"""
     
     base_dir = Path("PerformanceSystem")
-    
+
+    # Create every output directory up front, once
+    conv_file = base_dir / "convictions" / "model_convictions.xlsx"
+    pdf_dir = base_dir / "reports_pdfs"
+    template_file = base_dir / "templates" / "email_template.txt"
+    output_dir = base_dir / "output" / "emails"
+    for directory in (conv_file.parent, pdf_dir, template_file.parent, output_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
     # 1. Create sample conviction data
     logger.info("Creating sample convictions data...")
     convictions_data = {
@@ -44,61 +62,22 @@ def create_sample_data():
         ]
     }
     
-    conv_df = pd.DataFrame(convictions_data)
-    conv_file = base_dir / "convictions" / "model_convictions.xlsx"
-    conv_file.parent.mkdir(parents=True, exist_ok=True)
-    conv_df.to_excel(conv_file, index=False)
+    # Stream rows straight to XML in write-only mode — no DataFrame and
+    # no in-memory worksheet in between
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(convictions_data.keys()))
+    for row in zip(*convictions_data.values()):
+        sheet.append(list(row))
+    workbook.save(conv_file)
     logger.info(f"Created convictions file: {conv_file}")
-    
+
     # 2. Create sample PDF placeholders with realistic content
     logger.info("Creating sample PDF placeholders...")
-    pdf_dir = base_dir / "reports_pdfs"
-    pdf_dir.mkdir(parents=True, exist_ok=True)
-    
-    sample_clients = [
-        "John_Smith",
-        "Sarah_Johnson", 
-        "Michael_Brown",
-        "Emily_Davis",
-        "Robert_Wilson",
-        "Jennifer_Taylor",
-        "David_Anderson",
-        "Lisa_Martinez",
-        "James_Wilson",
-        "Maria_Garcia"
-    ]
-    
-    for i, client in enumerate(sample_clients):
-        # Create realistic sample PDF content
-        ytd_return = round(5.5 + (i * 1.2), 1)
-        inception_return = round(8.2 + (i * 0.8), 1)
-        sharpe_ratio = round(1.1 + (i * 0.05), 2)
-        
-        sample_content = f"""
-        PERFORMANCE REPORT
-        Client: {client.replace('_', ' ')}
-        
-        PERFORMANCE SUMMARY
-        YTD Return: {ytd_return}%
-        Rolling 12-Month: {ytd_return + 2.1}%
-        Since Inception Return: {inception_return}%
-        
-        RISK METRICS
-        Sharpe Ratio: {sharpe_ratio}
-        Beta: 0.{85 + i}
-        Max Drawdown: -{3.2 + (i * 0.3)}%
-        
-        HOLDINGS & ALLOCATIONS
-        Equity: {60 + i}%
-        Fixed Income: {25 - (i * 0.5)}%
-        Alternatives: {15 - (i * 0.5)}%
-        """
-        
-        pdf_path = pdf_dir / f"{client}.pdf"
-        with open(pdf_path, 'w') as f:
-            f.write(sample_content)
-    
-    logger.info(f"Created {len(sample_clients)} sample PDF files")
+
+    created = write_sample_pdfs(pdf_dir)
+
+    logger.info(f"Created {created} sample PDF files")
     
     # 3. Update email template with better formatting
     logger.info("Creating enhanced email template...")
@@ -137,57 +116,58 @@ Best regards,
 This email was generated using our automated performance reporting system.
 """
     
-    template_file = base_dir / "templates" / "email_template.txt"
-    template_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(template_file, 'w') as f:
-        f.write(template_content)
-    
+    template_file.write_text(template_content)
+
     logger.info(f"Created email template: {template_file}")
-    
-    # 4. Create output directory
-    output_dir = base_dir / "output" / "emails"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
+
     logger.info("✅ Sample data creation complete!")
     return base_dir
 
-def run_demo():
-    """Run a complete demonstration of the system"""
+async def run_demo_async():
+    """Run a complete demonstration of the system
+
+    The heavy steps run on worker threads via asyncio.to_thread so the
+    event loop stays free while sample data is written and the
+    generator walks the PDFs.
+    """
     logger.info("🚀 Starting Performance Email Generator Demo")
-    
+
     # Create sample data
-    base_dir = create_sample_data()
-    
+    base_dir = await asyncio.to_thread(create_sample_data)
+
     # Run the basic generator
     logger.info("Running basic email generator...")
     try:
-        from performance_email_generator import PerformanceEmailGenerator
-        
-        generator = PerformanceEmailGenerator(str(base_dir))
-        generator.process_all_reports()
-        
-        # Check results
+        if not _HAS_GENERATOR:
+            raise ImportError("performance_email_generator not found")
+
+        generator = await asyncio.to_thread(PerformanceEmailGenerator, str(base_dir))
+        await asyncio.to_thread(generator.process_all_reports)
+
+        # Check results; scandir reads the directory in one batched
+        # syscall without the per-match stat Path.glob performs
         output_dir = base_dir / "output" / "emails"
-        email_files = list(output_dir.glob("*.txt"))
-        
+        with os.scandir(output_dir) as entries:
+            email_files = [Path(entry.path) for entry in entries
+                           if entry.name.endswith('.txt')]
+
         logger.info(f"✅ Generated {len(email_files)} email files")
-        
+
         # Show sample email
         if email_files:
             sample_email = email_files[0]
             logger.info(f"\n📧 Sample Email ({sample_email.name}):")
             logger.info("=" * 50)
-            with open(sample_email, 'r') as f:
-                content = f.read()
-                # Show first 500 characters
-                print(content[:500] + "..." if len(content) > 500 else content)
+            content = await asyncio.to_thread(sample_email.read_text)
+            # Show first 500 characters
+            print(content[:500] + "..." if len(content) > 500 else content)
             logger.info("=" * 50)
-        
+
     except ImportError as e:
         logger.error(f"Error importing generator: {e}")
     except Exception as e:
         logger.error(f"Error running demo: {e}")
-    
+
     logger.info("✨ Demo complete!")
     
     # Instructions for next steps
@@ -216,5 +196,9 @@ Generated emails are saved in: {base_dir / 'output' / 'emails'}
     
     print(next_steps)
 
+def run_demo():
+    """Synchronous entry point for the demo pipeline"""
+    asyncio.run(run_demo_async())
+
 if __name__ == "__main__":
     run_demo()
\ No newline at end of file